@@ -12,8 +12,83 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
 from collections import defaultdict
+import concurrent.futures
 import sys
 
+# Set to True to dump extracted text and per-pattern match details
+DEBUG = False
+
+# Page parsing is CPU-bound, so statements longer than this are
+# extracted in a process pool; shorter ones stay sequential to avoid
+# process-startup cost
+_PARALLEL_PAGE_THRESHOLD = 2
+
+
+def _extract_page(pdf_path, password, page_num):
+    """Extract text from a single page (runs in a worker process)"""
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        if pdf_reader.is_encrypted:
+            pdf_reader.decrypt(password)
+        return page_num, pdf_reader.pages[page_num].extract_text()
+
+
+def _extract_page_plumber(pdf_path, password, page_num):
+    """Extract text from a single page with pdfplumber (worker process)"""
+    import pdfplumber
+    with pdfplumber.open(pdf_path, password=password) as pdf:
+        return page_num, pdf.pages[page_num].extract_text()
+
+
+def _extract_pages_parallel(worker, pdf_path, password, num_pages):
+    """Extract all pages in a process pool, returning texts in page order"""
+    page_texts = [''] * num_pages
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        futures = [
+            executor.submit(worker, pdf_path, password, page_num)
+            for page_num in range(num_pages)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            page_num, page_text = future.result()
+            page_texts[page_num] = page_text or ''
+    return page_texts
+
+# Enhanced patterns for Taiwanese bank statements, compiled once at import
+_TRANSACTION_PATTERNS = [
+    # Pattern for MM/DD format with Chinese description
+    re.compile(r'(\d{2}/\d{2})\s+([\u4e00-\u9fff\w\s\-\*\.]+?)\s+([\d,]+\.?\d*)', re.MULTILINE | re.DOTALL),
+    # Pattern for YYYY/MM/DD format
+    re.compile(r'(\d{4}/\d{2}/\d{2})\s+([\u4e00-\u9fff\w\s\-\*\.]+?)\s+([\d,]+\.?\d*)', re.MULTILINE | re.DOTALL),
+    # Pattern with transaction codes
+    re.compile(r'(\d{2}/\d{2})\s+(\d+)\s+([\u4e00-\u9fff\w\s\-\*\.]+?)\s+([\d,]+\.?\d*)', re.MULTILINE | re.DOTALL),
+    # Pattern for transactions with negative amounts
+    re.compile(r'(\d{2}/\d{2})\s+([\u4e00-\u9fff\w\s\-\*\.]+?)\s+\-?([\d,]+\.?\d*)', re.MULTILINE | re.DOTALL),
+    # Generic pattern for any transaction-like data
+    re.compile(r'(\d{1,2}/\d{1,2})\s+(.+?)\s+([\d,]+\.?\d*)', re.MULTILINE | re.DOTALL),
+    # Pattern with extra spaces
+    re.compile(r'(\d{2}/\d{2})\s{2,}([\u4e00-\u9fff\w\s\-\*\.]+?)\s{2,}([\d,]+\.?\d*)', re.MULTILINE | re.DOTALL),
+]
+
+def iter_pdf_pages(pdf_path, password):
+    """Yield per-page text from a password-protected PDF.
+
+    Streaming alternative to extract_pdf_text for batch use: memory stays
+    at one page of text instead of the whole statement, and
+    parse_transactions can scan pages as they arrive.
+    """
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        if pdf_reader.is_encrypted:
+            if pdf_reader.decrypt(password) == 0:
+                print("Failed to decrypt PDF with provided password")
+                return
+        for page_num, page in enumerate(pdf_reader.pages):
+            try:
+                yield page.extract_text()
+            except Exception as page_error:
+                print(f"Error extracting text from page {page_num + 1}: {page_error}")
+                continue
+
 def extract_pdf_text(pdf_path, password):
     """Extract text from password-protected PDF with improved error handling"""
     try:
@@ -37,7 +112,22 @@ def extract_pdf_text(pdf_path, password):
                         print(f"Decryption error: {decrypt_error}")
                         return None
                 
-                # Extract text from all pages
+                # Extract text from all pages, in parallel for longer
+                # statements since PyPDF2 parses content streams in Python
+                num_pages = len(pdf_reader.pages)
+                if num_pages > _PARALLEL_PAGE_THRESHOLD:
+                    try:
+                        page_texts = _extract_pages_parallel(
+                            _extract_page, pdf_path, password, num_pages)
+                        text = ""
+                        for page_num, page_text in enumerate(page_texts):
+                            text += f"--- Page {page_num + 1} ---\n"
+                            text += page_text + "\n\n"
+                            print(f"Extracted {len(page_text)} characters from page {page_num + 1}")
+                        return text
+                    except Exception as pool_error:
+                        print(f"Parallel extraction failed, falling back to sequential: {pool_error}")
+
                 text = ""
                 for page_num, page in enumerate(pdf_reader.pages):
                     try:
@@ -48,7 +138,7 @@ def extract_pdf_text(pdf_path, password):
                     except Exception as page_error:
                         print(f"Error extracting text from page {page_num + 1}: {page_error}")
                         continue
-                
+
                 return text
                 
             except Exception as reader_error:
@@ -88,15 +178,25 @@ def debug_pdf_content(pdf_path, password):
         
         with pdfplumber.open(pdf_path, password=password) as pdf:
             print(f"PDF opened successfully with pdfplumber. Pages: {len(pdf.pages)}")
-            
+            num_pages = len(pdf.pages)
+
+            if num_pages > _PARALLEL_PAGE_THRESHOLD:
+                try:
+                    page_texts = _extract_pages_parallel(
+                        _extract_page_plumber, pdf_path, password, num_pages)
+                except Exception as pool_error:
+                    print(f"Parallel extraction failed, falling back to sequential: {pool_error}")
+                    page_texts = [page.extract_text() for page in pdf.pages]
+            else:
+                page_texts = [page.extract_text() for page in pdf.pages]
+
             text = ""
-            for page_num, page in enumerate(pdf.pages):
-                page_text = page.extract_text()
+            for page_num, page_text in enumerate(page_texts):
                 if page_text:
                     text += f"--- Page {page_num + 1} ---\n"
                     text += page_text + "\n\n"
                     print(f"Page {page_num + 1}: {len(page_text)} characters")
-            
+
             return text
             
     except ImportError:
@@ -123,69 +223,58 @@ def debug_pdf_content(pdf_path, password):
         return None
 
 def parse_transactions(text):
-    """Parse transactions from extracted text with enhanced patterns"""
-    transactions = []
-    
-    # Print first 2000 characters for debugging
-    print("First 2000 characters of extracted text:")
-    print("=" * 50)
-    print(text[:2000])
-    print("=" * 50)
-    
-    # Enhanced patterns for Taiwanese bank statements
-    patterns = [
-        # Pattern for MM/DD format with Chinese description
-        r'(\d{2}/\d{2})\s+([\u4e00-\u9fff\w\s\-\*\.]+?)\s+([\d,]+\.?\d*)',
-        # Pattern for YYYY/MM/DD format
-        r'(\d{4}/\d{2}/\d{2})\s+([\u4e00-\u9fff\w\s\-\*\.]+?)\s+([\d,]+\.?\d*)',
-        # Pattern with transaction codes
-        r'(\d{2}/\d{2})\s+(\d+)\s+([\u4e00-\u9fff\w\s\-\*\.]+?)\s+([\d,]+\.?\d*)',
-        # Pattern for transactions with negative amounts
-        r'(\d{2}/\d{2})\s+([\u4e00-\u9fff\w\s\-\*\.]+?)\s+\-?([\d,]+\.?\d*)',
-        # Generic pattern for any transaction-like data
-        r'(\d{1,2}/\d{1,2})\s+(.+?)\s+([\d,]+\.?\d*)',
-        # Pattern with extra spaces
-        r'(\d{2}/\d{2})\s{2,}([\u4e00-\u9fff\w\s\-\*\.]+?)\s{2,}([\d,]+\.?\d*)',
-    ]
-    
-    for pattern_num, pattern in enumerate(patterns, 1):
-        print(f"Trying pattern {pattern_num}: {pattern}")
-        matches = re.findall(pattern, text, re.MULTILINE | re.DOTALL)
-        print(f"Found {len(matches)} matches with pattern {pattern_num}")
-        
-        for match in matches:
-            try:
-                if len(match) >= 3:
-                    date_str = match[0]
-                    description = match[-2].strip()  # Second to last element
-                    amount_str = match[-1].strip()   # Last element
-                    
-                    # Clean up amount string
-                    amount_str = re.sub(r'[^\d,.]', '', amount_str)
-                    if amount_str:
-                        amount = float(amount_str.replace(',', ''))
-                        
-                        transaction = {
-                            'date': date_str,
-                            'description': description,
-                            'amount': amount
-                        }
-                        transactions.append(transaction)
-                        print(f"Added transaction: {date_str} | {description[:30]}... | {amount}")
-                        
-            except (ValueError, IndexError) as e:
-                print(f"Error parsing match {match}: {e}")
+    """Parse transactions from extracted text with enhanced patterns.
+
+    Accepts either the full statement text or an iterable of per-page
+    strings (e.g. iter_pdf_pages); pages are scanned as they arrive so
+    memory stays proportional to one page rather than the whole blob.
+    """
+    frames = []
+    pages = [text] if isinstance(text, str) else text
+
+    for page_text in pages:
+        if not page_text:
+            continue
+
+        if DEBUG:
+            # Print first 2000 characters for debugging
+            print("First 2000 characters of extracted text:")
+            print("=" * 50)
+            print(page_text[:2000])
+            print("=" * 50)
+
+        for pattern_num, pattern in enumerate(_TRANSACTION_PATTERNS, 1):
+            matches = pattern.findall(page_text)
+            if DEBUG:
+                print(f"Pattern {pattern_num} ({pattern.pattern}): {len(matches)} matches")
+
+            if not matches:
                 continue
-    
-    # Remove duplicates
-    unique_transactions = []
-    seen = set()
-    for t in transactions:
-        key = (t['date'], t['description'], t['amount'])
-        if key not in seen:
-            seen.add(key)
-            unique_transactions.append(t)
-    
+
+            # Date is the first group, description/amount the last two;
+            # clean and convert whole columns instead of match-by-match
+            rows = pd.DataFrame(
+                [(match[0], match[-2], match[-1]) for match in matches],
+                columns=['date', 'description', 'amount']
+            )
+            rows['description'] = rows['description'].str.strip()
+            rows['amount'] = pd.to_numeric(
+                rows['amount'].str.replace(r'[^\d,.]', '', regex=True)
+                              .str.replace(',', '', regex=False),
+                errors='coerce'
+            )
+            frames.append(rows.dropna(subset=['amount']))
+    
+    # Remove duplicates with one vectorized pandas pass
+    if frames:
+        unique_transactions = (
+            pd.concat(frames, ignore_index=True)
+            .drop_duplicates(subset=['date', 'description', 'amount'], keep='first')
+            .to_dict('records')
+        )
+    else:
+        unique_transactions = []
+
     print(f"Total unique transactions found: {len(unique_transactions)}")
     return unique_transactions
 
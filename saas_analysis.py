@@ -5,103 +5,218 @@
 專門分析 Cursor、OpenAI 等技術工具的支出
 """
 
+import functools
+import hashlib
+import pickle
+import re
+from pathlib import Path
+
 import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib as mpl
 import matplotlib.font_manager as fm
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
 from collections import defaultdict
 
+try:
+    import ahocorasick  # single-pass multi-keyword matching (pyahocorasick)
+except ImportError:
+    ahocorasick = None
+
+try:
+    from joblib import Parallel, delayed  # thread-parallel column scans
+except ImportError:
+    Parallel = None
+
+# SaaS 服務關鍵字；字典順序即比對優先序
+SAAS_KEYWORDS = {
+    'AI/ML Tools': ['CURSOR', 'OPENAI', 'ANTHROPIC', 'LEONARDO', 'HEYGEN'],
+    'Design Tools': ['FIGMA', 'ADOBE'],
+    'Cloud Services': ['GOOGLE', 'Colab'],
+    'Development Tools': ['REPORTDASH', 'Gandi'],
+    'Marketing Tools': ['MANYCHAT', 'RSS.APP', 'SEASALT'],
+    'Media': ['SPOTIFY', 'PADDLE']
+}
+
+# 攤平的 關鍵字 → 類別 對照表
+KEYWORD_TO_CATEGORY = {
+    keyword: category
+    for category, keywords in SAAS_KEYWORDS.items()
+    for keyword in keywords
+}
+
+SERVICE_MAPPING = {
+    'cursor': 'Cursor AI IDE',
+    'openai': 'OpenAI (ChatGPT/API)',
+    'anthropic': 'Anthropic Claude',
+    'leonardo': 'Leonardo AI',
+    'heygen': 'HeyGen Video AI',
+    'figma': 'Figma Design',
+    'adobe': 'Adobe Creative Suite',
+    'google': 'Google Cloud/Services',
+    'reportdash': 'ReportDash Analytics',
+    'gandi': 'Gandi Domain/Hosting',
+    'colab': 'Google Colab Pro',
+    'manychat': 'ManyChat Marketing',
+    'seasalt': 'Seasalt.AI',
+    'spotify': 'Spotify Premium',
+    'paddle': 'Paddle Payment'
+}
+
+def _build_saas_automaton():
+    """所有 (類別, 關鍵字) 建成一個 Aho-Corasick 自動機"""
+    automaton = ahocorasick.Automaton()
+    for cat_priority, (category, keywords) in enumerate(SAAS_KEYWORDS.items()):
+        for kw_priority, keyword in enumerate(keywords):
+            automaton.add_word(keyword, (cat_priority, kw_priority, category, keyword.lower()))
+    automaton.make_automaton()
+    return automaton
+
+# 比對結構在 import 時建一次，重複呼叫不再重建
+_SAAS_AUTOMATON = _build_saas_automaton() if ahocorasick is not None else None
+
+# 全部關鍵字合成一條不分大小寫的 alternation（regex 後援路徑用），
+# 對照表鍵一併大寫，查表就不受命中文字的大小寫影響；
+# 值與自動機相同帶 (類別, 關鍵字) 優先序，多重命中時取最優先者
+_SAAS_KEYWORD_PATTERN = re.compile(
+    '(' + '|'.join(re.escape(keyword) for keyword in KEYWORD_TO_CATEGORY) + ')',
+    re.IGNORECASE,
+)
+_KEYWORD_UPPER_PRIORITY = {
+    keyword.upper(): (cat_priority, kw_priority, category, keyword.lower())
+    for cat_priority, (category, keywords) in enumerate(SAAS_KEYWORDS.items())
+    for kw_priority, keyword in enumerate(keywords)
+}
+
 def load_and_filter_saas_data(csv_path):
     """載入並篩選 SaaS 相關交易"""
-    df = pd.read_csv(csv_path, encoding='utf-8')
-    
-    # SaaS 服務關鍵字
-    saas_keywords = {
-        'AI/ML Tools': ['CURSOR', 'OPENAI', 'ANTHROPIC', 'LEONARDO', 'HEYGEN'],
-        'Design Tools': ['FIGMA', 'ADOBE'],
-        'Cloud Services': ['GOOGLE', 'Colab'],
-        'Development Tools': ['REPORTDASH', 'Gandi'],
-        'Marketing Tools': ['MANYCHAT', 'RSS.APP', 'SEASALT'],
-        'Media': ['SPOTIFY', 'PADDLE']
-    }
+    # 分析只用到 description 與 amount_abs，兩欄以外不讀、不推斷型別
+    # Arrow 欄式儲存：float32 減半記憶體，字串比對走連續 offset 而非物件陣列
+    df = pd.read_csv(
+        csv_path,
+        encoding='utf-8',
+        usecols=['description', 'amount_abs'],
+        dtype={'description': 'string[pyarrow]', 'amount_abs': 'float32[pyarrow]'},
+        dtype_backend='pyarrow',
+        engine='c',
+    )
     
     # 篩選 SaaS 相關交易
-    saas_transactions = []
-    
-    for idx, row in df.iterrows():
-        description = row['description'].upper()
-        for category, keywords in saas_keywords.items():
-            found = False
-            for keyword in keywords:
-                if keyword in description:
-                    row_copy = row.copy()
-                    row_copy['saas_category'] = category
-                    row_copy['saas_service'] = keyword.lower()
-                    saas_transactions.append(row_copy)
-                    found = True
-                    break
-            if found:
-                break
-    
-    if not saas_transactions:
+    saas_category = np.full(len(df), None, dtype=object)
+    saas_service = np.full(len(df), None, dtype=object)
+
+    if _SAAS_AUTOMATON is not None:
+        # 一個自動機掃描所有關鍵字，每筆描述只掃描一次
+        desc_up = df['description'].str.upper()
+        for i, description in enumerate(desc_up.fillna('').to_numpy()):
+            hits = [value for _, value in _SAAS_AUTOMATON.iter(description)]
+            if hits:
+                # 類別與關鍵字都依原本迴圈順序優先
+                _, _, category, service = min(hits)
+                saas_category[i] = category
+                saas_service[i] = service
+    else:
+        # 單一條不分大小寫的 alternation：不必先做 upper() 複本，
+        # 也不必逐類別掃描；findall 找出全部命中後依 (類別, 關鍵字)
+        # 原始順序取最優先者，與自動機路徑同一套裁決
+        all_hits = df['description'].fillna('').str.findall(_SAAS_KEYWORD_PATTERN)
+        for i, hits in enumerate(all_hits.to_numpy()):
+            if len(hits):
+                _, _, category, service = min(
+                    _KEYWORD_UPPER_PRIORITY[hit.upper()] for hit in hits
+                )
+                saas_category[i] = category
+                saas_service[i] = service
+
+    keep = pd.notna(saas_category)
+    if not keep.any():
         print("未找到 SaaS 相關交易")
         return pd.DataFrame()
-    
-    saas_df = pd.DataFrame(saas_transactions)
+
+    saas_df = df.loc[keep].copy()
+    saas_df['saas_category'] = saas_category[keep]
+    saas_df['saas_service'] = saas_service[keep]
     
     # 去除重複交易 - 基於 description 和 amount 的組合
     print(f"去重前: {len(saas_df)} 筆交易")
     
-    # 創建唯一標識符
-    saas_df['unique_id'] = saas_df['description'].str.replace('^\d{2}/\d{2} ', '', regex=True) + '_' + saas_df['amount_abs'].astype(str)
-    
-    # 去除重複，保留第一筆
-    saas_df_clean = saas_df.drop_duplicates(subset=['unique_id'], keep='first')
-    saas_df_clean = saas_df_clean.drop('unique_id', axis=1)
+    # 去除重複，保留第一筆 - 直接以 (去日期描述, 金額) 兩欄去重，
+    # 不需再串接成字串欄位；pattern 用原始字串傳入，
+    # 傳編譯好的 Pattern 會讓 pandas 落回非 pyarrow 慢路徑
+    saas_df['desc_key'] = saas_df['description'].str.replace(r'^\d{2}/\d{2} ', '', regex=True)
+    saas_df_clean = saas_df.drop_duplicates(subset=['desc_key', 'amount_abs'], keep='first')
+    saas_df_clean = saas_df_clean.drop('desc_key', axis=1)
     
     print(f"去重後: {len(saas_df_clean)} 筆 SaaS 相關交易")
-    
+
+    # 低基數欄位改用 categorical：記憶體小一半、groupby 走整數碼路徑
+    for col in ('saas_category', 'saas_service'):
+        saas_df_clean[col] = saas_df_clean[col].astype('category')
+
     return saas_df_clean
 
 def extract_service_details(saas_df):
     """提取服務詳細信息"""
-    
-    service_mapping = {
-        'cursor': 'Cursor AI IDE',
-        'openai': 'OpenAI (ChatGPT/API)',
-        'anthropic': 'Anthropic Claude',
-        'leonardo': 'Leonardo AI',
-        'heygen': 'HeyGen Video AI',
-        'figma': 'Figma Design',
-        'adobe': 'Adobe Creative Suite',
-        'google': 'Google Cloud/Services',
-        'reportdash': 'ReportDash Analytics',
-        'gandi': 'Gandi Domain/Hosting',
-        'colab': 'Google Colab Pro',
-        'manychat': 'ManyChat Marketing',
-        'seasalt': 'Seasalt.AI',
-        'spotify': 'Spotify Premium',
-        'paddle': 'Paddle Payment'
-    }
-    
-    saas_df['service_name'] = saas_df['saas_service'].map(service_mapping).fillna(saas_df['saas_service'])
-    
-    # 檢測訂閱類型
-    def detect_subscription_type(description):
-        desc_upper = description.upper()
-        if 'USAGE' in desc_upper:
-            return '按使用量計費'
-        elif 'SUBSCR' in desc_upper or 'SUBSCRIPTION' in desc_upper:
-            return '月度訂閱'
-        elif any(word in desc_upper for word in ['PRO', 'PREMIUM', 'PLUS']):
-            return '月度訂閱'
-        else:
-            return '一次性/其他'
-    
-    saas_df['subscription_type'] = saas_df['description'].apply(detect_subscription_type)
-    
+
+    # saas_service 已是 categorical，先回到 object 再 map：
+    # 對 categorical 做 map 後 fillna 會因類別集合不同而報錯
+    service_raw = saas_df['saas_service'].astype(object)
+    saas_df['service_name'] = service_raw.map(SERVICE_MAPPING).fillna(service_raw)
+    
+    # 檢測訂閱類型 - 以向量化的布林遮罩取代逐列 Python 函數；
+    # 三次 contains 掃描彼此獨立，有 joblib 時用執行緒並行
+    # （Arrow 字串核心會釋放 GIL，執行緒即可吃到多核）
+    desc_up = saas_df['description'].str.upper()
+    scans = [
+        ('USAGE', False),
+        ('SUBSCR', False),
+        ('PRO|PREMIUM|PLUS', True),
+    ]
+    if Parallel is not None:
+        m_usage, m_subscr, m_tier = Parallel(n_jobs=-1, prefer='threads')(
+            delayed(desc_up.str.contains)(pat, regex=regex, na=False)
+            for pat, regex in scans
+        )
+    else:
+        m_usage, m_subscr, m_tier = (
+            desc_up.str.contains(pat, regex=regex, na=False) for pat, regex in scans
+        )
+    # string/arrow dtype 的 contains 回傳 nullable boolean，
+    # np.select 只吃 numpy bool；na=False 保證沒有缺值，轉換安全
+    m_usage = m_usage.to_numpy(dtype=bool)
+    m_subscription = (m_subscr | m_tier).to_numpy(dtype=bool)
+    saas_df['subscription_type'] = np.select(
+        [m_usage, m_subscription],
+        ['按使用量計費', '月度訂閱'],
+        default='一次性/其他'
+    )
+
+    # 衍生欄位同樣轉 categorical
+    for col in ('service_name', 'subscription_type'):
+        saas_df[col] = saas_df[col].astype('category')
+
     return saas_df
 
+def _fast_agg(keys, values):
+    """factorize + bincount 聚合，輸出形狀與 groupby().agg(['sum','count','mean']) 相同
+
+    低基數字串鍵先轉成整數碼，sum/count 各只需一次 bincount，
+    略過 groupby 的雜湊分組與中間 Series 建構。
+    """
+    codes, uniques = pd.factorize(keys)
+    values = np.asarray(values, dtype=np.float64)
+    sums = np.bincount(codes, weights=values, minlength=len(uniques))
+    counts = np.bincount(codes, minlength=len(uniques))
+    return pd.DataFrame(
+        {
+            ('amount_abs', 'sum'): sums,
+            ('amount_abs', 'count'): counts,
+            ('amount_abs', 'mean'): sums / counts,
+        },
+        index=pd.Index(uniques, name=keys.name),
+    )
+
 def analyze_saas_spending(saas_df):
     """分析 SaaS 支出"""
     
@@ -110,22 +225,33 @@ def analyze_saas_spending(saas_df):
     num_transactions = len(saas_df)
     avg_transaction = saas_df['amount_abs'].mean()
     
-    # 按服務分類統計
-    category_stats = saas_df.groupby('saas_category').agg({
-        'amount_abs': ['sum', 'count', 'mean'],
-        'service_name': 'nunique'
-    }).round(2)
-    
+    # 按服務分類統計 - bincount 聚合，統計與圖表共用同一份結果
+    category_stats = _fast_agg(saas_df['saas_category'], saas_df['amount_abs']).round(2)
+    unique_pairs = saas_df[['saas_category', 'service_name']].drop_duplicates()
+    category_stats[('service_name', 'nunique')] = (
+        unique_pairs['saas_category'].value_counts()
+        .reindex(category_stats.index).to_numpy()
+    )
+
     # 按具體服務統計
-    service_stats = saas_df.groupby('service_name').agg({
-        'amount_abs': ['sum', 'count', 'mean']
-    }).round(2)
-    
+    service_stats = _fast_agg(saas_df['service_name'], saas_df['amount_abs']).round(2)
+
     # 按訂閱類型統計
-    subscription_stats = saas_df.groupby('subscription_type').agg({
-        'amount_abs': ['sum', 'count', 'mean']
-    }).round(2)
-    
+    subscription_stats = _fast_agg(saas_df['subscription_type'], saas_df['amount_abs']).round(2)
+
+    # 子圖用的切片同樣先算好，圖表端不再掃描整個 frame
+    cat_svc = saas_df.groupby(['saas_category', 'service_name'], observed=True)['amount_abs'].sum()
+    if 'AI/ML Tools' in cat_svc.index.get_level_values(0):
+        ai_ml_spending = cat_svc.xs('AI/ML Tools').sort_values(ascending=True)
+    else:
+        ai_ml_spending = pd.Series(dtype='float64')
+
+    svc_sub = saas_df.groupby(['saas_service', 'subscription_type'], observed=True)['amount_abs'].sum()
+    if 'cursor' in svc_sub.index.get_level_values(0):
+        cursor_by_type = svc_sub.xs('cursor')
+    else:
+        cursor_by_type = pd.Series(dtype='float64')
+
     analysis = {
         'total_spending': total_saas_spending,
         'num_services': num_services,
@@ -133,54 +259,65 @@ def analyze_saas_spending(saas_df):
         'avg_transaction': avg_transaction,
         'category_stats': category_stats,
         'service_stats': service_stats,
-        'subscription_stats': subscription_stats
+        'subscription_stats': subscription_stats,
+        # 圖表直接取用，避免重新 groupby
+        'category_spending': category_stats[('amount_abs', 'sum')],
+        'service_spending': service_stats[('amount_abs', 'sum')],
+        'subscription_counts': subscription_stats[('amount_abs', 'count')].sort_values(ascending=False),
+        'ai_ml_spending': ai_ml_spending,
+        'cursor_by_type': cursor_by_type
     }
-    
+
     return analysis
 
-def create_saas_visualizations(saas_df, analysis):
-    """創建 SaaS 支出可視化圖表"""
-    
-    # 嘗試找到可用的中文字體
+@functools.lru_cache(maxsize=1)
+def _find_chinese_font():
+    """透過 matplotlib 內建字體索引查找可用的中文字體名稱並快取"""
     chinese_fonts = ['Microsoft YaHei', 'SimHei', 'KaiTi', 'FangSong', 'Microsoft JhengHei']
-    available_font = None
-    
+
     for font_name in chinese_fonts:
         try:
-            # 檢查字體是否可用
-            font_files = fm.findSystemFonts()
-            for font_file in font_files:
-                try:
-                    font_prop = fm.FontProperties(fname=font_file)
-                    if font_name.lower() in font_prop.get_name().lower():
-                        available_font = font_name
-                        break
-                except:
-                    continue
-            if available_font:
-                break
-        except:
+            # findfont 查的是 matplotlib 的字體索引，不必逐檔掃描
+            fm.findfont(fm.FontProperties(family=font_name), fallback_to_default=False)
+            return font_name
+        except Exception:
             continue
-    
-    # 如果找不到中文字體，使用英文標題
+    return None
+
+def create_saas_visualizations(saas_df, analysis):
+    """創建 SaaS 支出可視化圖表"""
+
+    # 嘗試找到可用的中文字體（系統字體只掃描一次）
+    available_font = _find_chinese_font()
+
+    # 如果找不到中文字體，使用英文標題；
+    # 字體設定透過 rc_context 限定在繪圖期間，不污染全域 rcParams
     if available_font:
-        plt.rcParams['font.sans-serif'] = [available_font, 'Arial', 'DejaVu Sans']
-        plt.rcParams['axes.unicode_minus'] = False
+        rc = {'font.sans-serif': [available_font, 'Arial', 'DejaVu Sans'],
+              'axes.unicode_minus': False}
         use_chinese = True
     else:
-        plt.rcParams['font.family'] = ['Arial', 'DejaVu Sans']
+        rc = {'font.family': ['Arial', 'DejaVu Sans']}
         use_chinese = False
-    
-    fig, axes = plt.subplots(2, 3, figsize=(18, 12))
-    
+
+    with mpl.rc_context(rc):
+        _draw_saas_figure(saas_df, analysis, use_chinese)
+
+def _draw_saas_figure(saas_df, analysis, use_chinese):
+    """直接用 Agg 後端繪製並輸出圖表，不經過 pyplot 的全域狀態"""
+
+    fig = Figure(figsize=(18, 12))
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(2, 3)
+
     if use_chinese:
         fig.suptitle('企業 SaaS 服務支出分析 - 2025年5月\nThe Pocket Company by Accucrazy', fontsize=16, fontweight='bold')
     else:
         fig.suptitle('SaaS Service Spending Analysis - May 2025\nThe Pocket Company by Accucrazy', fontsize=16, fontweight='bold')
     
-    # 1. 按服務類別的支出餅圖
-    category_spending = saas_df.groupby('saas_category')['amount_abs'].sum()
-    colors = plt.cm.Set3(np.linspace(0, 1, len(category_spending)))
+    # 1. 按服務類別的支出餅圖（取用已算好的聚合結果）
+    category_spending = analysis['category_spending']
+    colors = mpl.colormaps['Set3'](np.linspace(0, 1, len(category_spending)))
     
     # 翻譯類別名稱
     if use_chinese:
@@ -208,7 +345,7 @@ def create_saas_visualizations(saas_df, analysis):
         axes[0, 0].set_title('Spending by SaaS Category')
     
     # 2. 前10大服務支出條形圖
-    top_services = saas_df.groupby('service_name')['amount_abs'].sum().sort_values(ascending=True).tail(10)
+    top_services = analysis['service_spending'].sort_values(ascending=True).tail(10)
     
     axes[0, 1].barh(range(len(top_services)), top_services.values, color='skyblue')
     axes[0, 1].set_yticks(range(len(top_services)))
@@ -222,7 +359,7 @@ def create_saas_visualizations(saas_df, analysis):
         axes[0, 1].set_title('Top 10 SaaS Services by Spending')
     
     # 3. 訂閱類型分布
-    subscription_counts = saas_df['subscription_type'].value_counts()
+    subscription_counts = analysis['subscription_counts']
     
     # 翻譯訂閱類型
     if use_chinese:
@@ -243,8 +380,10 @@ def create_saas_visualizations(saas_df, analysis):
     else:
         axes[0, 2].set_title('Subscription Type Distribution')
     
-    # 4. 交易金額分布
-    axes[1, 0].hist(saas_df['amount_abs'], bins=15, alpha=0.7, color='lightgreen', edgecolor='black')
+    # 4. 交易金額分布 - 先用 np.histogram 分箱，再以 bar 繪製
+    counts, edges = np.histogram(saas_df['amount_abs'].to_numpy(dtype=np.float32), bins=15)
+    axes[1, 0].bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+                   alpha=0.7, color='lightgreen', edgecolor='black')
     
     if use_chinese:
         axes[1, 0].set_xlabel('交易金額 (NT$)')
@@ -255,11 +394,10 @@ def create_saas_visualizations(saas_df, analysis):
         axes[1, 0].set_ylabel('Frequency')
         axes[1, 0].set_title('Transaction Amount Distribution')
     
-    # 5. AI/ML 工具詳細分析
-    ai_ml_data = saas_df[saas_df['saas_category'] == 'AI/ML Tools']
-    if not ai_ml_data.empty:
-        ai_spending = ai_ml_data.groupby('service_name')['amount_abs'].sum().sort_values(ascending=True)
-        
+    # 5. AI/ML 工具詳細分析（取用已算好的切片）
+    ai_spending = analysis['ai_ml_spending']
+    if not ai_spending.empty:
+
         axes[1, 1].barh(range(len(ai_spending)), ai_spending.values, color='orange')
         axes[1, 1].set_yticks(range(len(ai_spending)))
         axes[1, 1].set_yticklabels(ai_spending.index)
@@ -274,11 +412,10 @@ def create_saas_visualizations(saas_df, analysis):
         no_data_text = '無 AI/ML 工具數據' if use_chinese else 'No AI/ML Tools Data'
         axes[1, 1].text(0.5, 0.5, no_data_text, ha='center', va='center', transform=axes[1, 1].transAxes)
     
-    # 6. Cursor 專項分析
-    cursor_data = saas_df[saas_df['saas_service'] == 'cursor']
-    if not cursor_data.empty:
-        cursor_by_type = cursor_data.groupby('subscription_type')['amount_abs'].sum()
-        
+    # 6. Cursor 專項分析（取用已算好的切片）
+    cursor_by_type = analysis['cursor_by_type']
+    if not cursor_by_type.empty:
+
         axes[1, 2].bar(range(len(cursor_by_type)), cursor_by_type.values, color='purple', alpha=0.7)
         axes[1, 2].set_xticks(range(len(cursor_by_type)))
         
@@ -301,19 +438,23 @@ def create_saas_visualizations(saas_df, analysis):
         no_cursor_text = '無 Cursor 數據' if use_chinese else 'No Cursor Data'
         axes[1, 2].text(0.5, 0.5, no_cursor_text, ha='center', va='center', transform=axes[1, 2].transAxes)
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     # 在圖表底部添加公司標識
     fig.text(0.5, 0.02, 'The Pocket Company by Accucrazy', ha='center', va='bottom', 
              fontsize=10, style='italic', alpha=0.7)
     
-    plt.savefig('saas_spending_analysis.png', dpi=300, bbox_inches='tight', facecolor='white')
+    fig.savefig('saas_spending_analysis.png', dpi=300, bbox_inches='tight', facecolor='white')
     print("SaaS 分析圖表已保存為 'saas_spending_analysis.png'")
 
 def generate_saas_report(saas_df, analysis):
     """生成 SaaS 支出分析報告"""
-    
-    report = f"""
+
+    grand_total = analysis['total_spending']
+
+    # 片段收進 list 最後一次 join，避免反覆字串串接；
+    # 欄位先整批抽成 numpy 陣列，迴圈內不再做 MultiIndex .loc 查詢
+    parts = [f"""
 ================================================
 企業 SaaS 服務支出分析報告
 第一銀行信用卡帳單 - 2025年5月
@@ -321,56 +462,56 @@ The Pocket Company by Accucrazy
 ================================================
 
 總體概況：
-- SaaS 總支出：NT$ {analysis['total_spending']:,.2f}
+- SaaS 總支出：NT$ {grand_total:,.2f}
 - 使用服務數量：{analysis['num_services']} 個
 - 總交易次數：{analysis['num_transactions']} 筆
 - 平均每筆交易：NT$ {analysis['avg_transaction']:,.2f}
 
 按服務類別分析：
-"""
-    
-    for category in analysis['category_stats'].index:
-        total = analysis['category_stats'].loc[category, ('amount_abs', 'sum')]
-        count = analysis['category_stats'].loc[category, ('amount_abs', 'count')]
-        percentage = (total / analysis['total_spending']) * 100
-        
-        report += f"""
+"""]
+
+    category_stats = analysis['category_stats']
+    cat_sums = category_stats[('amount_abs', 'sum')].to_numpy()
+    cat_counts = category_stats[('amount_abs', 'count')].to_numpy()
+
+    for category, total, count in zip(category_stats.index, cat_sums, cat_counts):
+        percentage = (total / grand_total) * 100
+        parts.append(f"""
 {category}：
   - 總支出：NT$ {total:,.2f} ({percentage:.1f}%)
   - 交易次數：{count} 筆
-"""
-    
-    report += "\n前10大 SaaS 服務支出：\n"
-    
+""")
+
+    parts.append("\n前10大 SaaS 服務支出：\n")
+
     top_services = analysis['service_stats'].sort_values(('amount_abs', 'sum'), ascending=False).head(10)
-    
-    for i, (service, data) in enumerate(top_services.iterrows(), 1):
-        total = data[('amount_abs', 'sum')]
-        count = data[('amount_abs', 'count')]
-        percentage = (total / analysis['total_spending']) * 100
-        
-        report += f"{i:2d}. {service}: NT$ {total:,.2f} ({percentage:.1f}%) - {count}筆交易\n"
-    
+    svc_sums = top_services[('amount_abs', 'sum')].to_numpy()
+    svc_counts = top_services[('amount_abs', 'count')].to_numpy()
+
+    for i, (service, total, count) in enumerate(zip(top_services.index, svc_sums, svc_counts), 1):
+        percentage = (total / grand_total) * 100
+        parts.append(f"{i:2d}. {service}: NT$ {total:,.2f} ({percentage:.1f}%) - {count}筆交易\n")
+
     # AI/ML 工具詳細分析
     ai_ml_tools = saas_df[saas_df['saas_category'] == 'AI/ML Tools']
     if not ai_ml_tools.empty:
         ai_ml_total = ai_ml_tools['amount_abs'].sum()
-        
-        report += f"""
+
+        parts.append(f"""
 AI/ML 工具詳細分析：
 總支出：NT$ {ai_ml_total:,.2f}
 
 具體工具：
-"""
-        
-        ai_tools_detail = ai_ml_tools.groupby('service_name')['amount_abs'].agg(['sum', 'count'])
-        
-        for tool in ai_tools_detail.index:
-            tool_total = ai_tools_detail.loc[tool, 'sum']
-            tool_count = ai_tools_detail.loc[tool, 'count']
-            report += f"• {tool}：NT$ {tool_total:,.2f} ({tool_count}筆)\n"
-    
-    report += """
+""")
+
+        ai_tools_detail = ai_ml_tools.groupby('service_name', observed=True)['amount_abs'].agg(['sum', 'count'])
+        tool_sums = ai_tools_detail['sum'].to_numpy()
+        tool_counts = ai_tools_detail['count'].to_numpy()
+
+        for tool, tool_total, tool_count in zip(ai_tools_detail.index, tool_sums, tool_counts):
+            parts.append(f"• {tool}：NT$ {tool_total:,.2f} ({tool_count}筆)\n")
+
+    parts.append("""
 成本優化建議：
 
 1. Cursor AI 使用監控：檢查使用量計費是否合理
@@ -382,23 +523,50 @@ AI/ML 工具詳細分析：
 報告生成：The Pocket Company by Accucrazy
 分析日期：2025年
 ================================================
-"""
-    
-    return report
+""")
+
+    return ''.join(parts)
+
+# 快取版本：管線邏輯改動時遞增，讓舊快取自動失效
+_CACHE_VERSION = 2
+
+def _saas_cache_path(csv_path):
+    """以輸入 CSV 的內容雜湊產生快取路徑；輸入不存在時回傳 None"""
+    try:
+        with open(csv_path, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+    cache_dir = Path('.cache')
+    cache_dir.mkdir(exist_ok=True)
+    return cache_dir / f'saas_{_CACHE_VERSION}_{digest}.pkl'
 
 def main():
     """主要執行函數"""
     print("開始 SaaS 服務支出分析...")
-    
-    saas_df = load_and_filter_saas_data('clean_transactions.csv')
-    
-    if saas_df.empty:
-        print("沒有找到 SaaS 相關交易數據")
-        return
-    
-    saas_df = extract_service_details(saas_df)
-    analysis = analyze_saas_spending(saas_df)
-    
+
+    csv_path = 'clean_transactions.csv'
+
+    # 輸入沒變就直接載入上次的結果，重跑只剩讀 pickle 的成本
+    cache_file = _saas_cache_path(csv_path)
+    if cache_file is not None and cache_file.exists():
+        with open(cache_file, 'rb') as f:
+            saas_df, analysis = pickle.load(f)
+        print(f"已載入快取分析結果：{cache_file}")
+    else:
+        saas_df = load_and_filter_saas_data(csv_path)
+
+        if saas_df.empty:
+            print("沒有找到 SaaS 相關交易數據")
+            return
+
+        saas_df = extract_service_details(saas_df)
+        analysis = analyze_saas_spending(saas_df)
+
+        if cache_file is not None:
+            with open(cache_file, 'wb') as f:
+                pickle.dump((saas_df, analysis), f)
+
     create_saas_visualizations(saas_df, analysis)
     
     report = generate_saas_report(saas_df, analysis)
@@ -407,7 +575,8 @@ def main():
     with open('saas_analysis_report.txt', 'w', encoding='utf-8') as f:
         f.write(report)
     
-    saas_df.to_csv('saas_transactions.csv', index=False, encoding='utf-8')
+    # chunksize 限制寫出時的峰值記憶體，讓格式化與 I/O 交錯進行
+    saas_df.to_csv('saas_transactions.csv', index=False, encoding='utf-8', chunksize=50_000)
     
     print("\n" + "="*60)
     print("SaaS 分析完成！")